@@ -0,0 +1,57 @@
+# Generated by Django 4.0 on 2026-10-15 12:20
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def price_to_cents(apps, schema_editor):
+    Recipe = apps.get_model('recipe_api', 'Recipe')
+    recipes = list(Recipe.objects.only('id', 'price'))
+    for recipe in recipes:
+        recipe.price_cents = int(recipe.price * 100)
+    Recipe.objects.bulk_update(recipes, ['price_cents'], batch_size=500)
+
+
+def price_to_decimal(apps, schema_editor):
+    Recipe = apps.get_model('recipe_api', 'Recipe')
+    recipes = list(Recipe.objects.only('id', 'price_cents'))
+    for recipe in recipes:
+        recipe.price = Decimal(recipe.price_cents) / 100
+    Recipe.objects.bulk_update(recipes, ['price'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe_api', '0009_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='price_cents',
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=6),
+        ),
+        migrations.RunPython(price_to_cents, price_to_decimal),
+        migrations.RemoveField(
+            model_name='recipe',
+            name='price',
+        ),
+        migrations.RenameField(
+            model_name='recipe',
+            old_name='price_cents',
+            new_name='price',
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='price',
+            field=models.PositiveIntegerField(help_text='Price in cents.'),
+        ),
+    ]
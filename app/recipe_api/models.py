@@ -3,6 +3,7 @@ Recipe models.
 """
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Recipe(models.Model):
@@ -11,11 +12,17 @@ class Recipe(models.Model):
     title = models.CharField(max_length=255)
     thumbnail = models.ImageField(upload_to='images/recipes/', null=True, blank=True)
     time_minutes = models.IntegerField(default=1)
-    price = models.DecimalField(max_digits=6, decimal_places=2)
+    price = models.PositiveIntegerField(help_text='Price in cents.')
     description = models.TextField(max_length=255)
     link = models.URLField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag', blank=True)
     ingredients = models.ManyToManyField('Ingredient', blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id']),
+        ]
 
     def __str__(self):
         return self.title
@@ -26,9 +33,23 @@ class Tag(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-name']),
+        ]
+
     def save(self, *args, **kwargs):
         self.name = str(self.name).lower().replace(' ', '-')
-        return super(Tag, self).save(*args, **kwargs)
+        adding = self._state.adding
+        result = super(Tag, self).save(*args, **kwargs)
+        if not adding:  # New tags are not assigned to recipes yet
+            self.recipe_set.update(updated_at=timezone.now())
+        return result
+
+    def delete(self, *args, **kwargs):
+        # Queryset and cascade deletes (e.g. deleting the user) bypass this hook
+        self.recipe_set.update(updated_at=timezone.now())
+        return super(Tag, self).delete(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -39,9 +60,23 @@ class Ingredient(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-name']),
+        ]
+
     def save(self, *args, **kwargs):
         self.name = str(self.name).capitalize()
-        return super(Ingredient, self).save(*args, **kwargs)
+        adding = self._state.adding
+        result = super(Ingredient, self).save(*args, **kwargs)
+        if not adding:  # New ingredients are not assigned to recipes yet
+            self.recipe_set.update(updated_at=timezone.now())
+        return result
+
+    def delete(self, *args, **kwargs):
+        # Queryset and cascade deletes (e.g. deleting the user) bypass this hook
+        self.recipe_set.update(updated_at=timezone.now())
+        return super(Ingredient, self).delete(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,12 @@
+"""
+Pagination for recipe_api.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Paginate recipes by cursor so pages never run a COUNT(*) or OFFSET scan."""
+    ordering = '-id'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -7,6 +7,24 @@ from .models import Recipe, Tag, Ingredient
 from user_api.serializers import UserSerializer
 
 
+def _cents_to_str(cents):
+    """Format an amount of cents as a decimal string with two places."""
+    return f'{cents // 100}.{cents % 100:02d}'
+
+
+class PriceCentsField(serializers.DecimalField):
+    """Price stored in cents but exchanged as a decimal string."""
+
+    def __init__(self, **kwargs):
+        super().__init__(max_digits=6, decimal_places=2, min_value=0, **kwargs)
+
+    def to_internal_value(self, data):
+        return int(super().to_internal_value(data) * 100)
+
+    def to_representation(self, value):
+        return _cents_to_str(value)
+
+
 class IngredientSerializer(serializers.ModelSerializer):
     user = UserSerializer(many=False, read_only=True)
 
@@ -25,14 +43,28 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Recipe
-        fields = ('id', 'title', 'time_minutes', 'price', 'link',)
-        read_only_fields = ('id',)
+class RecipeListSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    title = serializers.CharField(read_only=True)
+    time_minutes = serializers.IntegerField(read_only=True)
+    price = PriceCentsField(read_only=True)
+    link = serializers.URLField(read_only=True)
+    tags = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+    def to_representation(self, instance):
+        """Build a plain dict directly, declared fields are only used for the schema."""
+        return {
+            'id': instance.id,
+            'title': instance.title,
+            'time_minutes': instance.time_minutes,
+            'price': _cents_to_str(instance.price),
+            'link': instance.link,
+            'tags': [tag.id for tag in instance.tags.all()],
+        }
 
 
 class RecipeDetailSerializer(serializers.ModelSerializer):
+    price = PriceCentsField()
     user = UserSerializer(many=False, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     ingredients = IngredientSerializer(many=True, read_only=True)
@@ -44,6 +76,7 @@ class RecipeDetailSerializer(serializers.ModelSerializer):
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
+    price = PriceCentsField()
     user = UserSerializer(many=False, read_only=True)
     tags = serializers.PrimaryKeyRelatedField(many=True, queryset=Tag.objects.all(), required=False)
     ingredients = serializers.PrimaryKeyRelatedField(many=True, queryset=Ingredient.objects.all(), required=False)
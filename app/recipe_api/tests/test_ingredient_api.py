@@ -1,9 +1,7 @@
 """
 Tests for ingredient API.
 """
-from decimal import Decimal
-
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -29,7 +27,7 @@ def create_user(email='user@example.com', password='testpassword123'):
     )
 
 
-class PublicTestIngredientAPI(TestCase):
+class PublicTestIngredientAPI(SimpleTestCase):
     """Testing unauthenticated APIs requests."""
 
     def setUp(self):
@@ -159,7 +157,7 @@ class PrivateTestIngredientAPI(TestCase):
         recipe = Recipe.objects.create(
             title='Apple Crumble',
             time_minutes=5,
-            price=Decimal('4.50'),
+            price=450,
             user=self.user,
         )
         recipe.ingredients.add(in1)
@@ -178,13 +176,13 @@ class PrivateTestIngredientAPI(TestCase):
         recipe1 = Recipe.objects.create(
             title='Eggs Benedict',
             time_minutes=60,
-            price=Decimal('7.00'),
+            price=700,
             user=self.user,
         )
         recipe2 = Recipe.objects.create(
             title='Herb Eggs',
             time_minutes=20,
-            price=Decimal('4.00'),
+            price=400,
             user=self.user,
         )
         recipe1.ingredients.add(ing)
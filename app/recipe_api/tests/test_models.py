@@ -1,8 +1,6 @@
 """
 Testing recipe models.
 """
-from decimal import Decimal
-
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -27,7 +25,7 @@ class TestModels(TestCase):
             user=user,
             title='Recipe title',
             time_minutes=5,
-            price=Decimal('5.50'),
+            price=550,
             description='Recipe description'
         )
         self.assertEqual(str(recipe), recipe.title)
@@ -35,17 +33,19 @@ class TestModels(TestCase):
     def test_create_tag(self):
         """Test create tags is successfully."""
         user = create_user()
-        tag = Tag.objects.create(
-            user=user,
-            name='tag1'
-        )
+        with self.assertNumQueries(1):
+            tag = Tag.objects.create(
+                user=user,
+                name='tag1'
+            )
         self.assertEqual(str(tag), tag.name)
 
     def test_create_ingredient(self):
         """Test create ingredient is successfully."""
         user = create_user()
-        ingredient = Ingredient.objects.create(
-            user=user,
-            name='Ingredient name'
-        )
+        with self.assertNumQueries(1):
+            ingredient = Ingredient.objects.create(
+                user=user,
+                name='Ingredient name'
+            )
         self.assertEqual(str(ingredient), ingredient.name)
@@ -2,13 +2,16 @@
 Test for recipe_api.
 """
 # import os
+import pickle
 import tempfile
+from functools import lru_cache
 
 from PIL import Image
 
 from decimal import Decimal
 
-from django.test import TestCase
+from django.db.models import Prefetch
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -16,11 +19,20 @@ from rest_framework.test import APIClient
 from rest_framework import status
 
 from recipe_api.models import Recipe, Tag, Ingredient
-from recipe_api.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe_api.serializers import RecipeListSerializer, RecipeDetailSerializer
+
+User = get_user_model()
 
 RECIPES_URL = reverse('recipe_api:recipe-list')
 
 
+def recipes_list_queryset():
+    """Creates and return recipes queryset as loaded by the list endpoint."""
+    return Recipe.objects.only('id', 'title', 'time_minutes', 'price', 'link', 'user').prefetch_related(
+        Prefetch('tags', queryset=Tag.objects.only('id', 'name', 'user')))
+
+
+@lru_cache(maxsize=None)
 def recipes_detail_url(recipe_id):
     """Creates and return recipe details URL."""
     return reverse('recipe_api:recipe-detail', args=[recipe_id])
@@ -51,15 +63,19 @@ def create_recipe(user, **params):
     payload = {
         'title': 'Sample title',
         'time_minutes': 4,
-        'price': Decimal('1.50'),
+        'price': 150,
         'description': 'Sample description',
         'link': 'https://example.com/recipe.pdf'
     }
     payload.update(params)
-    return Recipe.objects.create(user=user, **payload)
+    tags = payload.pop('tags', None)
+    recipe = Recipe.objects.create(user=user, **payload)
+    if tags:
+        recipe.tags.set(tags)
+    return recipe
 
 
-class TestPublicRecipeAPI(TestCase):
+class TestPublicRecipeAPI(SimpleTestCase):
     """Test unauthenticated API requests."""
 
     def setUp(self):
@@ -75,49 +91,200 @@ class TestPublicRecipeAPI(TestCase):
 class TestPrivateRecipeAPI(TestCase):
     """Test authorized API requests."""
 
-    def setUp(self):
-        self.client = APIClient()
-        self.user = get_user_model().objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             email='user@example.com',
             password='userexample123'
         )
+        # Never authenticated, so skip hashing a password for it
+        cls.other_user = User.objects.create_user(email='other@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
         self.client.force_authenticate(user=self.user)
 
     def test_retrieve_recipes(self):
         """Test retrieve list of recipes."""
-        create_recipe(user=self.user)
-        create_recipe(user=self.user)
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, title='Sample title', time_minutes=4, price=150),
+            Recipe(user=self.user, title='Sample title', time_minutes=4, price=150),
+        ])
 
-        res = self.client.get(RECIPES_URL)
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
 
-        recipes = Recipe.objects.all().order_by('-id')
-        serializer = RecipeSerializer(recipes, many=True)
+        recipes = recipes_list_queryset().order_by('-id')
+        serializer = RecipeListSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Test list of recipes is limited to authenticated users."""
-        other_user = get_user_model().objects.create_user(
-            email='other@example.com',
-            password='password123'
-        )
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, title='Sample title', time_minutes=4, price=150),
+            Recipe(user=self.other_user, title='Sample title', time_minutes=4, price=150),
+        ])
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        recipes = recipes_list_queryset().filter(user=self.user).order_by('-id')
+        serializer = RecipeListSerializer(recipes, many=True)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], serializer.data)
+        self.assertEqual(len(res.data['results']), len(serializer.data))
+
+    def test_recipe_list_paginated_by_cursor(self):
+        """Test list of recipes is paginated with a cursor."""
+        recipes = Recipe.objects.bulk_create([
+            Recipe(user=self.user, title=f'recipe{i}', time_minutes=4, price=150) for i in range(3)
+        ])
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', res.data)
+        self.assertEqual([r['id'] for r in res.data['results']], [recipes[2].id, recipes[1].id])
+        self.assertIsNotNone(res.data['next'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual([r['id'] for r in res.data['results']], [recipes[0].id])
+        self.assertIsNone(res.data['next'])
+
+    def test_list_cache_roundtrip(self):
+        """Test list payload survives a cache pickle round trip as plain dicts."""
         create_recipe(user=self.user)
-        create_recipe(user=other_user)
 
         res = self.client.get(RECIPES_URL)
+        self.assertIs(type(res.data['results'][0]), dict)
+        cached = pickle.loads(pickle.dumps(res.data['results']))
 
-        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
-        serializer = RecipeSerializer(recipes, many=True)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached, res.data['results'])
+        self.assertIs(type(cached[0]), dict)
+
+    def test_list_not_modified_with_etag(self):
+        """Test list returns not modified for a matching ETag."""
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+        self.assertIn('ETag', res)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_after_delete(self):
+        """Test list ETag is invalidated when a recipe is deleted."""
+        create_recipe(user=self.user)
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+        self.client.delete(recipes_detail_url(recipe.pk))
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
-        self.assertEqual(len(res.data), len(serializer.data))
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_detail_not_modified_with_etag(self):
+        """Test recipe detail returns not modified until the recipe is updated."""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(recipes_detail_url(recipe.pk))['ETag']
+
+        res = self.client.get(recipes_detail_url(recipe.pk), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotIn('Last-Modified', res)
+
+        self.client.patch(recipes_detail_url(recipe.pk), {'title': 'New title'})
+        res = self.client.get(recipes_detail_url(recipe.pk), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New title')
+
+    def test_detail_etag_changes_after_user_update(self):
+        """Test recipe detail ETag is invalidated when its nested user changes."""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(recipes_detail_url(recipe.pk))['ETag']
+        self.user.first_name = 'New name'
+        self.user.save()
+
+        res = self.client.get(recipes_detail_url(recipe.pk), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['user']['first_name'], 'New name')
+
+    def test_detail_invalid_pk_not_found(self):
+        """Test recipe detail with a non numeric pk returns not found."""
+        res = self.client.get(recipes_detail_url('abc'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_etag_changes_after_tag_update(self):
+        """Test recipe detail ETag is invalidated when one of its tags changes."""
+        tag = create_tag(user=self.user)
+        recipe = create_recipe(user=self.user, tags=[tag])
+        etag = self.client.get(recipes_detail_url(recipe.pk))['ETag']
+        tag.name = 'New tag'
+        tag.save()
+
+        res = self.client.get(recipes_detail_url(recipe.pk), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'new-tag')
+
+    def test_detail_etag_changes_after_tag_delete(self):
+        """Test recipe detail ETag is invalidated when one of its tags is deleted."""
+        tag = create_tag(user=self.user)
+        recipe = create_recipe(user=self.user, tags=[tag])
+        etag = self.client.get(recipes_detail_url(recipe.pk))['ETag']
+        tag.delete()
+
+        res = self.client.get(recipes_detail_url(recipe.pk), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'], [])
+
+    def test_detail_etag_changes_after_ingredient_update(self):
+        """Test recipe detail ETag is invalidated when one of its ingredients changes."""
+        ingredient = create_ingredient(user=self.user)
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.add(ingredient)
+        etag = self.client.get(recipes_detail_url(recipe.pk))['ETag']
+        ingredient.name = 'new ingredient'
+        ingredient.save()
+
+        res = self.client.get(recipes_detail_url(recipe.pk), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['ingredients'][0]['name'], 'New ingredient')
+
+    def test_detail_etag_changes_after_ingredient_delete(self):
+        """Test recipe detail ETag is invalidated when one of its ingredients is deleted."""
+        ingredient = create_ingredient(user=self.user)
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.add(ingredient)
+        etag = self.client.get(recipes_detail_url(recipe.pk))['ETag']
+        ingredient.delete()
+
+        res = self.client.get(recipes_detail_url(recipe.pk), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['ingredients'], [])
 
     def test_get_recipe_detail(self):
         """Test get details of recipe."""
         recipe = create_recipe(user=self.user)
-        res = self.client.get(recipes_detail_url(recipe.pk))
+        recipe.tags.add(create_tag(user=self.user, name='tag1'), create_tag(user=self.user, name='tag2'))
+        recipe.ingredients.add(
+            create_ingredient(user=self.user, name='ingredient1'),
+            create_ingredient(user=self.user, name='ingredient2'),
+        )
+        with self.assertNumQueries(5):
+            res = self.client.get(recipes_detail_url(recipe.pk))
         serializer = RecipeDetailSerializer(recipe)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -133,14 +300,26 @@ class TestPrivateRecipeAPI(TestCase):
             'link': 'https://example.com'
         }
         res = self.client.post(RECIPES_URL, payload)
-        exists = Recipe.objects.filter(id=res.data['id']).exists()
-        recipe = Recipe.objects.get(id=res.data['id'])
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.price, int(payload.pop('price') * 100))
         for k, v in payload.items():
             self.assertEqual(getattr(recipe, k), v)
-        self.assertTrue(exists)
         self.assertEqual(recipe.user, self.user)
 
+    def test_create_recipe_negative_price_error(self):
+        """Test create recipe with a negative price fails."""
+        payload = {
+            'title': 'Sample title',
+            'time_minutes': 3,
+            'price': Decimal('-1.50'),
+            'description': 'Sample description',
+        }
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
     def test_perform_partial_update_recipe(self):
         """Partial update a recipe."""
         payload = {
@@ -150,9 +329,8 @@ class TestPrivateRecipeAPI(TestCase):
         recipe = create_recipe(user=self.user)
         res = self.client.patch(recipes_detail_url(recipe.pk), payload)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        recipe.refresh_from_db()
-        self.assertEqual(recipe.title, payload['title'])
-        self.assertEqual(recipe.time_minutes, payload['time_minutes'])
+        self.assertEqual(res.data['title'], payload['title'])
+        self.assertEqual(res.data['time_minutes'], payload['time_minutes'])
 
     def test_perform_fully_update_recipe(self):
         """Fully updated recipe."""
@@ -167,27 +345,26 @@ class TestPrivateRecipeAPI(TestCase):
         res = self.client.put(recipes_detail_url(recipe.pk), payload)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        recipe.refresh_from_db()
+        self.assertEqual(Decimal(res.data['price']), payload.pop('price'))
         for k, v in payload.items():
-            self.assertEqual(getattr(recipe, k), v)
-        self.assertEqual(recipe.user, self.user)
+            self.assertEqual(res.data[k], v)
+        self.assertEqual(res.data['user']['id'], self.user.pk)
 
     def test_error_when_try_to_change_user(self):
         """Test try to change recipe user with error."""
-        new_user = get_user_model().objects.create_user(email='newuser@example.com', password='password123')
         recipe = create_recipe(user=self.user)
         payload = {
-            'user': new_user.pk
+            'user': self.other_user.pk
         }
         res = self.client.patch(recipes_detail_url(recipe.pk), payload)
-        recipe.refresh_from_db()
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(recipe.user, self.user)
+        self.assertEqual(res.data['user']['id'], self.user.pk)
 
     def test_delete_recipe(self):
         """Fully delete a recipe success."""
         recipe = create_recipe(user=self.user)
-        res = self.client.delete(recipes_detail_url(recipe.pk))
+        with self.assertNumQueries(4):
+            res = self.client.delete(recipes_detail_url(recipe.pk))
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         recipes = Recipe.objects.filter(id=recipe.pk).exists()
         self.assertFalse(recipes)
@@ -198,8 +375,7 @@ class TestPrivateRecipeAPI(TestCase):
             'title': 'New title',
             'time_minutes': 120
         }
-        new_user = get_user_model().objects.create_user(email='newuser@example.com', password='password123')
-        recipe = create_recipe(user=new_user)
+        recipe = create_recipe(user=self.other_user)
 
         res = self.client.patch(recipes_detail_url(recipe.pk), payload)
 
@@ -210,8 +386,7 @@ class TestPrivateRecipeAPI(TestCase):
 
     def test_try_to_delete_other_user_recipe(self):
         """Test trying to delete recipe with other user."""
-        new_user = get_user_model().objects.create_user(email='newuser@example.com', password='password123')
-        recipe = create_recipe(user=new_user)
+        recipe = create_recipe(user=self.other_user)
         res = self.client.delete(recipes_detail_url(recipe.pk))
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
         exists = Recipe.objects.filter(id=recipe.pk).exists()
@@ -219,27 +394,28 @@ class TestPrivateRecipeAPI(TestCase):
 
     def test_create_recipe_with_tags(self):
         """Test create a new recipe with multiples tags."""
-        tag1 = create_tag(user=self.user, name='tag1')
-        tag2 = create_tag(user=self.user, name='tag2')
+        tags = Tag.objects.bulk_create([
+            Tag(user=self.user, name='tag1'),
+            Tag(user=self.user, name='tag2'),
+        ])
         payload = {
             'title': 'Sample title',
             'time_minutes': 3,
             'price': Decimal('1.50'),
             'description': 'Sample description',
             'link': 'https://example.com',
-            'tags': [tag1.pk, tag2.pk]
+            'tags': [tag.pk for tag in tags]
         }
         res = self.client.post(RECIPES_URL, payload)
-        exists = Recipe.objects.filter(id=res.data['id']).exists()
-        recipe = Recipe.objects.get(id=res.data['id'])
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
         tags = recipe.tags.all()
         self.assertEqual(tags[0].pk, payload['tags'][0])
         self.assertEqual(tags[1].pk, payload['tags'][1])
         payload.pop('tags')
+        self.assertEqual(recipe.price, int(payload.pop('price') * 100))
         for k, v in payload.items():
             self.assertEqual(getattr(recipe, k), v)
-        self.assertTrue(exists)
         self.assertEqual(recipe.user, self.user)
 
     def test_create_recipe_with_ingredients(self):
@@ -255,16 +431,15 @@ class TestPrivateRecipeAPI(TestCase):
             'ingredients': [ingredient1.pk, ingredient2.pk]
         }
         res = self.client.post(RECIPES_URL, payload)
-        exists = Recipe.objects.filter(id=res.data['id']).exists()
-        recipe = Recipe.objects.get(id=res.data['id'])
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
         ingredients = recipe.ingredients.all()
         self.assertEqual(ingredients[0].pk, payload['ingredients'][0])
         self.assertEqual(ingredients[1].pk, payload['ingredients'][1])
         payload.pop('ingredients')
+        self.assertEqual(recipe.price, int(payload.pop('price') * 100))
         for k, v in payload.items():
             self.assertEqual(getattr(recipe, k), v)
-        self.assertTrue(exists)
         self.assertEqual(recipe.user, self.user)
 
     def test_filter_recipes_by_tags(self):
@@ -284,14 +459,13 @@ class TestPrivateRecipeAPI(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
-        serializer_recipe1 = RecipeSerializer(recipe1)
-        serializer_recipe2 = RecipeSerializer(recipe2)
-        serializer_recipe3 = RecipeSerializer(recipe3)
+        serializer = RecipeListSerializer([recipe1, recipe2, recipe3], many=True)
+        data_recipe1, data_recipe2, data_recipe3 = serializer.data
 
-        self.assertEqual(len(res.data), 2)
-        self.assertIn(serializer_recipe1.data, res.data)
-        self.assertIn(serializer_recipe2.data, res.data)
-        self.assertNotIn(serializer_recipe3.data, res.data)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIn(data_recipe1, res.data['results'])
+        self.assertIn(data_recipe2, res.data['results'])
+        self.assertNotIn(data_recipe3, res.data['results'])
 
     def test_filter_recipes_by_ingredients(self):
         """Test filtering recipes using ingredients query params."""
@@ -309,14 +483,13 @@ class TestPrivateRecipeAPI(TestCase):
         res = self.client.get(RECIPES_URL, params)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        serializer_recipe1 = RecipeSerializer(recipe1)
-        serializer_recipe2 = RecipeSerializer(recipe2)
-        serializer_recipe3 = RecipeSerializer(recipe3)
+        serializer = RecipeListSerializer([recipe1, recipe2, recipe3], many=True)
+        data_recipe1, data_recipe2, data_recipe3 = serializer.data
 
-        self.assertEqual(len(res.data), 2)
-        self.assertIn(serializer_recipe1.data, res.data)
-        self.assertIn(serializer_recipe2.data, res.data)
-        self.assertNotIn(serializer_recipe3.data, res.data)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIn(data_recipe1, res.data['results'])
+        self.assertIn(data_recipe2, res.data['results'])
+        self.assertNotIn(data_recipe3, res.data['results'])
 
 
 class TestImageUpload(TestCase):
@@ -324,7 +497,7 @@ class TestImageUpload(TestCase):
 
     def setUp(self):
         self.client = APIClient()
-        self.user = get_user_model().objects.create_user(
+        self.user = User.objects.create_user(
             email='user@example.com',
             password='testpassword123'
         )
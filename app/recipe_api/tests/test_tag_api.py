@@ -1,9 +1,7 @@
 """
 Test for tags.
 """
-from decimal import Decimal
-
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -38,7 +36,7 @@ def create_user(**user):
     return user
 
 
-class PublicTestTagAPI(TestCase):
+class PublicTestTagAPI(SimpleTestCase):
     def setUp(self):
         self.client = APIClient()
 
@@ -157,7 +155,7 @@ class PrivateTestTagAPI(TestCase):
         recipe = Recipe.objects.create(
             title='Green Eggs on Toast',
             time_minutes=10,
-            price=Decimal('2.50'),
+            price=250,
             user=self.user,
         )
         recipe.tags.add(tag1)
@@ -176,13 +174,13 @@ class PrivateTestTagAPI(TestCase):
         recipe1 = Recipe.objects.create(
             title='Pancakes',
             time_minutes=5,
-            price=Decimal('5.00'),
+            price=500,
             user=self.user,
         )
         recipe2 = Recipe.objects.create(
             title='Porridge',
             time_minutes=3,
-            price=Decimal('2.00'),
+            price=200,
             user=self.user,
         )
         recipe1.tags.add(tag)
@@ -1,6 +1,12 @@
 """
 Views for recipe_api endpoint.
 """
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Prefetch, Q
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -14,14 +20,40 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from .models import Recipe, Tag, Ingredient
+from .pagination import RecipeCursorPagination
 from .serializers import (RecipeCreateSerializer,
-                          RecipeSerializer,
+                          RecipeListSerializer,
                           RecipeDetailSerializer,
                           TagSerializer,
                           IngredientSerializer,
                           RecipeImageSerializer)
 
 
+def _recipe_list_etag(request, *args, **kwargs):
+    """ETag for recipes list, changes on any create, update or delete of user recipes."""
+    stats = Recipe.objects.filter(user=request.user).aggregate(count=Count('id'), updated_at=Max('updated_at'))
+    if stats['updated_at'] is None:
+        return None
+    return f"{stats['count']}-{stats['updated_at'].timestamp()}"
+
+
+def _recipe_detail_etag(request, pk=None, *args, **kwargs):
+    """ETag for recipe details based on its last update and the users nested in it.
+
+    Last-Modified is avoided for its one second resolution.
+    """
+    try:
+        updated_at = Recipe.objects.filter(user=request.user, pk=pk).values_list('updated_at', flat=True).first()
+    except (ValueError, TypeError):  # Invalid pk, let the view answer 404
+        return None
+    if updated_at is None:
+        return None
+    users = get_user_model().objects.filter(
+        Q(recipe=pk) | Q(tag__recipe=pk) | Q(ingredient__recipe=pk)
+    ).distinct().order_by('id').values_list('id', 'email', 'first_name', 'last_name')
+    return hashlib.md5(f'{updated_at.timestamp()}-{list(users)}'.encode()).hexdigest()
+
+
 class BaseRecipeAttrViewSet(viewsets.ModelViewSet):
     """Base viewset for recipe attributes."""
     permission_classes = (permissions.IsAuthenticated,)
@@ -71,6 +103,15 @@ class RecipeViewSet(BaseRecipeAttrViewSet):
     model = Recipe
     serializer_class = RecipeDetailSerializer
     queryset = Recipe.objects.all()
+    pagination_class = RecipeCursorPagination
+
+    @method_decorator(condition(etag_func=_recipe_list_etag))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(condition(etag_func=_recipe_detail_etag))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def _params_to_ints(self, qs):
         """Convert string into a list of integers."""
@@ -81,6 +122,15 @@ class RecipeViewSet(BaseRecipeAttrViewSet):
         tags = self.request.query_params.get('tags', None)
         ingredients = self.request.query_params.get('ingredients', None)
         queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list':
+            queryset = queryset.only('id', 'title', 'time_minutes', 'price', 'link', 'user').prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.only('id', 'name', 'user')))
+        elif self.action == 'retrieve':
+            queryset = queryset.select_related('user').prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.select_related('user')),
+                Prefetch('ingredients', queryset=Ingredient.objects.select_related('user')))
+        else:
+            queryset = queryset.select_related('user')
         if tags:
             tag_ids = self._params_to_ints(tags)
             queryset = queryset.filter(tags__id__in=tag_ids)
@@ -92,7 +142,7 @@ class RecipeViewSet(BaseRecipeAttrViewSet):
     def get_serializer_class(self):
         """Returns serializer class for the request."""
         if self.action == 'list':
-            return RecipeSerializer
+            return RecipeListSerializer
         elif self.action == 'create' or self.action == 'update':
             return RecipeCreateSerializer
         elif self.action == 'upload_image':
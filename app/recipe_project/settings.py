@@ -81,6 +81,8 @@ DATABASES = {
         'NAME': os.environ.get('POSTGRES_DB'),
         'USER': os.environ.get('POSTGRES_USER'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
+        # Keep connections open between requests instead of reconnecting on each one
+        'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 60)),
     }
 }
 
@@ -92,6 +94,11 @@ if 'test' in sys.argv or 'test_coverage' in sys.argv:  # Covers regular testing
             'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
         }
     }
+    # Build test tables straight from the models instead of replaying every migration
+    MIGRATION_MODULES = {
+        'recipe_api': None,
+        'core': None,
+    }
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators